@@ -8,26 +8,33 @@ Features:
 """
 
 import email
+import email.parser
 import imaplib
+import multiprocessing
 import os
+import pathlib
 import re
 import sqlite3
 import threading
 import urllib.parse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import closing, contextmanager
 from dataclasses import dataclass
+from datetime import datetime
 from queue import Queue
-from typing import List, Optional, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 import pendulum
 from dotenv import load_dotenv
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
+from sortedcontainers import SortedDict
 
 console = Console()
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DateRange:
     """Represents a range of dates."""
 
@@ -47,30 +54,67 @@ class DateRange:
         )
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EmailMetadata:
     """Represents cached email metadata."""
 
     message_id: str
     from_address: str
     subject: str
-    date: pendulum.DateTime
-    gmail_link: str
+    date: int  # unix timestamp in seconds
 
 
 class EmailCache:
     """Manages the local cache of email metadata with date range tracking."""
 
-    def __init__(self, db_path: str = "email_cache.db"):
+    def __init__(self, db_path: str = "email_cache.db", read_pool_size: int = 4):
         self.db_path = db_path
-        self._init_db()
         self._lock = threading.Lock()
 
+        # Single long-lived writer; transactions are managed explicitly
+        self._writer = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None
+        )
+        self._configure(self._writer)
+        self._init_db()
+
+        # Pool of read-only connections, opened once the schema exists
+        # (as_uri percent-encodes characters such as ?, # and % in the path)
+        self._readers: Queue = Queue()
+        reader_uri = pathlib.Path(db_path).resolve().as_uri() + "?mode=ro"
+        for _ in range(read_pool_size):
+            reader = sqlite3.connect(reader_uri, uri=True, check_same_thread=False)
+            self._configure(reader)
+            self._readers.put(reader)
+
+    @staticmethod
+    def _configure(conn: sqlite3.Connection):
+        """Apply per-connection pragmas (WAL mode itself persists in the file)."""
+        conn.execute("PRAGMA foreign_keys = ON")
+        # WAL makes NORMAL sync durable enough and avoids an fsync per commit
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA mmap_size = 1073741824")
+        conn.execute("PRAGMA cache_size = -65536")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        # INSERT OR REPLACE only fires delete triggers (keeping FTS in sync)
+        # when recursive triggers are enabled
+        conn.execute("PRAGMA recursive_triggers = ON")
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Check out a read-only connection from the pool."""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
     def _init_db(self):
         """Initialize the SQLite database schema."""
-        with sqlite3.connect(self.db_path) as conn:
-            # Enable foreign keys and WAL mode for better concurrency
-            conn.execute("PRAGMA foreign_keys = ON")
+        with self._lock:
+            conn = self._writer
+            # Enable WAL mode for better concurrency
             conn.execute("PRAGMA journal_mode = WAL")
 
             # Email metadata table
@@ -80,12 +124,12 @@ class EmailCache:
                     message_id TEXT PRIMARY KEY,
                     from_address TEXT NOT NULL,
                     subject TEXT,
-                    date TEXT NOT NULL,
-                    gmail_link TEXT,
+                    date INTEGER NOT NULL,
                     cached_at TEXT NOT NULL
                 )
             """
             )
+            self._migrate_emails_table(conn)
 
             # Date range coverage table
             conn.execute(
@@ -99,25 +143,161 @@ class EmailCache:
             )
 
             # Indexes for better query performance
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_date ON emails(date)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_from ON emails(from_address)")
+            # Covering index: date-bounded searches read every selected column
+            # from the index leaves without visiting the table; it also
+            # supersedes the old single-column idx_date, and idx_from, which
+            # the planner never picks over it for date-bounded searches
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_search_cov
+                ON emails(date, from_address, subject, message_id)
+            """
+            )
+            conn.execute("DROP INDEX IF EXISTS idx_date")
+            conn.execute("DROP INDEX IF EXISTS idx_from")
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_cached_at ON emails(cached_at)"
             )
 
-            # Ensure changes are committed
+            # Trigram full-text index over the emails table, so plain-text
+            # patterns keep substring semantics but are served natively;
+            # needs SQLite 3.34+ built with FTS5, otherwise searches use REGEXP
+            try:
+                has_fts = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'emails_fts'"
+                ).fetchone()
+                conn.execute(
+                    """
+                    CREATE VIRTUAL TABLE IF NOT EXISTS emails_fts USING fts5(
+                        from_address,
+                        subject,
+                        content='emails',
+                        content_rowid='rowid',
+                        tokenize='trigram case_sensitive 1'
+                    )
+                """
+                )
+                # Fails here if FTS5 is missing, even for an existing table
+                conn.execute("SELECT 1 FROM emails_fts LIMIT 0")
+                conn.execute(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS emails_ai AFTER INSERT ON emails BEGIN
+                        INSERT INTO emails_fts (rowid, from_address, subject)
+                        VALUES (new.rowid, new.from_address, new.subject);
+                    END
+                """
+                )
+                conn.execute(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS emails_ad AFTER DELETE ON emails BEGIN
+                        INSERT INTO emails_fts
+                            (emails_fts, rowid, from_address, subject)
+                        VALUES ('delete', old.rowid, old.from_address, old.subject);
+                    END
+                """
+                )
+                conn.execute(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS emails_au AFTER UPDATE ON emails BEGIN
+                        INSERT INTO emails_fts
+                            (emails_fts, rowid, from_address, subject)
+                        VALUES ('delete', old.rowid, old.from_address, old.subject);
+                        INSERT INTO emails_fts (rowid, from_address, subject)
+                        VALUES (new.rowid, new.from_address, new.subject);
+                    END
+                """
+                )
+                if not has_fts:
+                    # Index any emails cached before the FTS table existed
+                    conn.execute(
+                        "INSERT INTO emails_fts (emails_fts) VALUES ('rebuild')"
+                    )
+                self._fts_enabled = True
+            except sqlite3.OperationalError:
+                # Without the triggers, writes no longer touch the FTS table
+                for trigger in ("emails_ai", "emails_ad", "emails_au"):
+                    conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                self._fts_enabled = False
+
+            self._ranges = self._load_ranges(conn)
+
+    @staticmethod
+    def _load_ranges(conn: sqlite3.Connection) -> SortedDict:
+        """Load cached date ranges, keyed by start date."""
+        ranges = SortedDict()
+        cursor = conn.execute("SELECT start_date, end_date FROM date_ranges")
+        for start_date, end_date in cursor.fetchall():
+            date_range = EmailCache._row_to_range(start_date, end_date)
+            ranges[date_range.start] = date_range
+        return ranges
+
+    @staticmethod
+    def _row_to_range(start_date: str, end_date: str) -> DateRange:
+        """Build a DateRange from stored ISO strings."""
+        # Dates are always stored via isoformat(), so skip pendulum's parser
+        return DateRange(
+            start=pendulum.instance(datetime.fromisoformat(start_date)),
+            end=pendulum.instance(datetime.fromisoformat(end_date)),
+        )
+
+    @staticmethod
+    def _migrate_emails_table(conn: sqlite3.Connection):
+        """Rebuild an emails table from an older version with the current schema."""
+        columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(emails)")}
+        legacy_date = columns.get("date") == "TEXT"
+        legacy_link = "gmail_link" in columns
+        if not legacy_date and not legacy_link:
+            return
+
+        # Convert ISO text dates to unix timestamps
+        date_expr = "CAST(strftime('%s', date) AS INTEGER)" if legacy_date else "date"
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                CREATE TABLE emails_new (
+                    message_id TEXT PRIMARY KEY,
+                    from_address TEXT NOT NULL,
+                    subject TEXT,
+                    date INTEGER NOT NULL,
+                    cached_at TEXT NOT NULL
+                )
+            """
+            )
+            # Keep rowids so the rebuilt FTS index lines up with the old rows;
+            # rows whose date cannot be converted could never match a range
+            cursor = conn.execute(
+                f"""
+                INSERT INTO emails_new
+                (rowid, message_id, from_address, subject, date, cached_at)
+                SELECT rowid, message_id, from_address, subject, {date_expr}, cached_at
+                FROM emails WHERE {date_expr} IS NOT NULL
+            """
+            )
+            migrated = cursor.rowcount
+            (total,) = conn.execute("SELECT COUNT(*) FROM emails").fetchone()
+
+            # Dropping the table also drops its indexes and triggers, which
+            # _init_db recreates; the FTS index is rebuilt from scratch
+            conn.execute("DROP TABLE emails")
+            conn.execute("ALTER TABLE emails_new RENAME TO emails")
+            conn.execute("DROP TABLE IF EXISTS emails_fts")
             conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if migrated < total:
+            console.print(
+                f"[yellow]Dropped {total - migrated} cached emails with unreadable "
+                "dates while upgrading the cache[/yellow]"
+            )
 
     def get_cached_ranges(self) -> List[DateRange]:
         """Get list of date ranges that are fully cached."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "SELECT start_date, end_date FROM date_ranges ORDER BY start_date"
-            )
-            return [
-                DateRange(start=pendulum.parse(row[0]), end=pendulum.parse(row[1]))
-                for row in cursor.fetchall()
-            ]
+        with self._lock:
+            return list(self._ranges.values())
 
     def find_missing_ranges(self, target_range: DateRange) -> List[DateRange]:
         """Find date ranges that need to be fetched to cover the target range."""
@@ -144,110 +324,195 @@ class EmailCache:
             return
 
         with self._lock:
+            conn = self._writer
+            # Take the write lock up front rather than upgrading mid-transaction,
+            # which can fail with SQLITE_BUSY instead of waiting on busy_timeout
+            conn.execute("BEGIN IMMEDIATE")
+
             try:
-                with sqlite3.connect(self.db_path) as conn:
-                    # Begin transaction
-                    conn.execute("BEGIN TRANSACTION")
+                # Store email metadata as multi-row inserts, so SQLite runs one
+                # statement per chunk instead of one per email
+                now = pendulum.now("UTC").isoformat()
+                chunk_size = 150  # 5 params per row stays under SQLite's 999 limit
+                for i in range(0, len(emails), chunk_size):
+                    chunk = emails[i : i + chunk_size]
+                    placeholders = ", ".join(["(?, ?, ?, ?, ?)"] * len(chunk))
+                    conn.execute(
+                        f"""
+                        INSERT OR REPLACE INTO emails
+                        (message_id, from_address, subject, date, cached_at)
+                        VALUES {placeholders}
+                        """,
+                        [
+                            value
+                            for email in chunk
+                            for value in (
+                                email.message_id,
+                                email.from_address,
+                                email.subject,
+                                email.date,
+                                now,
+                            )
+                        ],
+                    )
 
-                    try:
-                        # Store email metadata
-                        now = pendulum.now("UTC").isoformat()
-                        conn.executemany(
-                            """
-                            INSERT OR REPLACE INTO emails
-                            (message_id, from_address, subject, date, gmail_link, cached_at)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                            """,
-                            [
-                                (
-                                    email.message_id,
-                                    email.from_address,
-                                    email.subject,
-                                    email.date.isoformat(),
-                                    email.gmail_link,
-                                    now,
-                                )
-                                for email in emails
-                            ],
-                        )
-
-                        # Update date range coverage
-                        self._update_date_ranges(conn, date_range)
-
-                        # Commit transaction
-                        conn.commit()
-                    except Exception as e:
-                        conn.rollback()
-                        raise
-            except Exception as e:
+                # Update date range coverage
+                self._update_date_ranges(conn, date_range)
+
+                # Commit transaction
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                # Discard in-memory range changes from the failed transaction
+                self._ranges = self._load_ranges(conn)
                 raise
 
     def _update_date_ranges(self, conn: sqlite3.Connection, new_range: DateRange):
         """Update the cached date ranges, merging overlapping ranges."""
-        try:
-            ranges = self.get_cached_ranges()
-            ranges.append(new_range)
-
-            # Sort ranges by start date
-            ranges.sort(key=lambda r: r.start)
-
-            # Merge overlapping ranges
-            merged = []
-            if ranges:
-                current = ranges[0]
-                for next_range in ranges[1:]:
-                    if current.overlaps(next_range):
-                        current = current.merge(next_range)
-                    else:
-                        merged.append(current)
-                        current = next_range
-                merged.append(current)
-
-            # Update database
-            conn.execute("DELETE FROM date_ranges")
-            conn.executemany(
-                "INSERT INTO date_ranges (start_date, end_date) VALUES (?, ?)",
-                [(r.start.isoformat(), r.end.isoformat()) for r in merged],
+        # Only rows overlapping the new range are merged; others are untouched
+        cursor = conn.execute(
+            """
+            SELECT id, start_date, end_date FROM date_ranges
+            WHERE NOT (end_date < ? OR start_date > ?)
+            """,
+            (new_range.start.isoformat(), new_range.end.isoformat()),
+        )
+        absorbed_ids = []
+        merged = new_range
+        for row_id, start_date, end_date in cursor.fetchall():
+            absorbed = self._row_to_range(start_date, end_date)
+            absorbed_ids.append(row_id)
+            merged = merged.merge(absorbed)
+
+        # Nothing to do if the new range is already fully covered
+        if len(absorbed_ids) == 1 and absorbed == merged:
+            return
+
+        if absorbed_ids:
+            placeholders = ", ".join("?" * len(absorbed_ids))
+            conn.execute(
+                f"DELETE FROM date_ranges WHERE id IN ({placeholders})", absorbed_ids
             )
-        except Exception as e:
-            raise
+        conn.execute(
+            "INSERT INTO date_ranges (start_date, end_date) VALUES (?, ?)",
+            (merged.start.isoformat(), merged.end.isoformat()),
+        )
+
+        for start in list(self._ranges.irange(merged.start, merged.end)):
+            del self._ranges[start]
+        self._ranges[merged.start] = merged
+
+    def _fts_phrase(self, pattern: str) -> Optional[str]:
+        """Return an FTS5 phrase for plain-text patterns, or None to use REGEXP."""
+        if not self._fts_enabled:
+            return None
+        # Trigram queries need at least three characters to match anything
+        if len(pattern) < 3 or re.escape(pattern) != pattern:
+            return None
+        return '"' + pattern.replace('"', '""') + '"'
+
+    @staticmethod
+    def _anchor_globs(pattern: str) -> List[str]:
+        """Return GLOB patterns implied by a literal ^prefix or suffix$ in a regex."""
+        # Alternation may make an anchor apply to only one branch, and global
+        # inline flags such as (?i) or (?x) change what a literal run matches
+        ignored_flags = re.IGNORECASE | re.VERBOSE | re.MULTILINE
+        if "|" in pattern or re.compile(pattern).flags & ignored_flags:
+            return []
+
+        def is_literal(char: str) -> bool:
+            return re.escape(char) == char
+
+        globs = []
+        if pattern.startswith("^"):
+            end = 1
+            while end < len(pattern) and is_literal(pattern[end]):
+                end += 1
+            prefix = pattern[1:end]
+            # A following quantifier may make the last character optional
+            if end < len(pattern) and pattern[end] in "*?{":
+                prefix = prefix[:-1]
+            if prefix:
+                globs.append(prefix + "*")
+
+        if pattern.endswith("$") and not pattern.endswith("\\$"):
+            start = len(pattern) - 1
+            while start > 0 and is_literal(pattern[start - 1]):
+                start -= 1
+            suffix = pattern[start:-1]
+            # The first character may belong to an escape sequence such as \d
+            if start > 0 and pattern[start - 1] == "\\":
+                suffix = suffix[1:]
+            if suffix:
+                globs.append("*" + suffix)
+
+        return globs
 
     def search_emails(
         self, pattern: str, date_range: Optional[DateRange] = None
-    ) -> List[EmailMetadata]:
-        """Search cached emails using regex pattern and optional date range."""
-        query = "SELECT * FROM emails WHERE from_address REGEXP ?"
-        params = [pattern]
+    ) -> Iterator[EmailMetadata]:
+        """
+        Search cached emails using regex pattern and optional date range.
+        Results are yielded newest first; a pooled read connection is held
+        until the generator is exhausted or closed.
+        """
+        columns = "e.message_id, e.from_address, e.subject, e.date"
+        phrase = self._fts_phrase(pattern)
+        if phrase:
+            query = (
+                f"SELECT {columns} FROM emails e "
+                "JOIN emails_fts f ON f.rowid = e.rowid WHERE emails_fts MATCH ?"
+            )
+            params = [f"from_address : {phrase}"]
+        else:
+            # Anchored literals become GLOB prefilters, cheap C-level checks
+            # on the covering index entries, so the regex sees fewer rows
+            globs = self._anchor_globs(pattern)
+            conditions = ["e.from_address GLOB ?"] * len(globs)
+            conditions.append("e.from_address REGEXP ?")
+            query = f"SELECT {columns} FROM emails e WHERE " + " AND ".join(conditions)
+            params = [*globs, pattern]
 
         if date_range:
-            query += " AND date >= ? AND date <= ?"
-            params.extend([date_range.start.isoformat(), date_range.end.isoformat()])
-
-        with sqlite3.connect(self.db_path) as conn:
-            conn.create_function(
-                "REGEXP", 2, lambda pattern, text: bool(re.search(pattern, text or ""))
+            query += " AND e.date >= ? AND e.date <= ?"
+            params.extend(
+                [date_range.start.int_timestamp, date_range.end.int_timestamp]
             )
 
-            cursor = conn.execute(query, params)
-            return [
-                EmailMetadata(
+        # Sorting in SQL (served by idx_search_cov) lets rows stream in display order
+        query += " ORDER BY e.date DESC"
+
+        with self._reader() as conn:
+            if not phrase:
+                # Compile once per query rather than looking the pattern up in
+                # re's cache for every row; the pooled connection is ours alone
+                compiled = re.compile(pattern)
+                conn.create_function(
+                    "REGEXP",
+                    2,
+                    lambda _pattern, text: compiled.search(text or "") is not None,
+                    deterministic=True,
+                )
+
+            for row in conn.execute(query, params):
+                yield EmailMetadata(
                     message_id=row[0],
                     from_address=row[1],
                     subject=row[2],
-                    date=pendulum.parse(row[3]),
-                    gmail_link=row[4],
+                    date=row[3],
                 )
-                for row in cursor.fetchall()
-            ]
 
     def cleanup_old_data(self, days_to_keep: int = 365):
         """Remove emails older than specified days."""
         cutoff_date = pendulum.now("UTC").subtract(days=days_to_keep)
 
         with self._lock:
-            with sqlite3.connect(self.db_path) as conn:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+
+            try:
                 conn.execute(
-                    "DELETE FROM emails WHERE date < ?", (cutoff_date.isoformat(),)
+                    "DELETE FROM emails WHERE date < ?", (cutoff_date.int_timestamp,)
                 )
 
                 # Update date ranges
@@ -266,6 +531,72 @@ class EmailCache:
                     (cutoff_date.isoformat(),),
                 )
 
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._ranges = self._load_ranges(conn)
+
+    def optimize(self):
+        """Refresh query planner statistics and truncate the WAL file."""
+        with self._lock:
+            conn = self._writer
+            conn.execute("PRAGMA optimize")
+            # An open results generator holds a read snapshot that TRUNCATE
+            # would wait on; with no busy timeout it reports busy instead of
+            # stalling writers queued behind the cache lock
+            conn.execute("PRAGMA busy_timeout = 0")
+            try:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                conn.execute("PRAGMA busy_timeout = 5000")
+
+    def close(self):
+        """Close the writer and all pooled read connections."""
+        while not self._readers.empty():
+            try:
+                self._readers.get_nowait().close()
+            except Exception:
+                break
+        with self._lock:
+            # SQLite recommends running optimize just before closing
+            self._writer.execute("PRAGMA optimize")
+            self._writer.close()
+
+
+# Fetches only contain header fields, so skip the parser's body handling
+_header_parser = email.parser.BytesHeaderParser()
+
+
+def _parse_header_bytes(raw: bytes) -> Optional[EmailMetadata]:
+    """Parse a raw IMAP header block into email metadata (runs in worker processes)."""
+    header = _header_parser.parsebytes(raw)
+
+    # Parse email metadata
+    message_id = header.get("Message-ID", "").strip()
+    from_address = IMAPClient._decode_header(header.get("From", ""))
+    subject = IMAPClient._decode_header(header.get("Subject", "(No Subject)"))
+    date = IMAPClient._parse_date(header.get("Date"))
+
+    if not all([message_id, from_address, date]):
+        return None
+    return EmailMetadata(
+        message_id=message_id,
+        from_address=from_address,
+        subject=subject,
+        date=date.int_timestamp,
+    )
+
+
+def _parse_header_batch(raw_headers: List[bytes]) -> List[EmailMetadata]:
+    """Parse one fetched batch of raw headers (runs in worker processes)."""
+    return [
+        metadata
+        for metadata in map(_parse_header_bytes, raw_headers)
+        if metadata is not None
+    ]
+
 
 class IMAPClient:
     """Handles all IMAP operations with connection pooling."""
@@ -275,6 +606,7 @@ class IMAPClient:
         self.app_password = app_password
         self.max_workers = max_workers
         self.connection_pool = Queue()
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
         self._init_pool()
 
     def _init_pool(self):
@@ -301,6 +633,15 @@ class IMAPClient:
         except Exception:
             return self._create_connection()
 
+    def _get_parse_pool(self) -> ProcessPoolExecutor:
+        """Get the process pool used for header parsing, starting it on first use."""
+        if self._parse_pool is None:
+            # Spawn rather than fork, since fetch threads may hold locks
+            self._parse_pool = ProcessPoolExecutor(
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._parse_pool
+
     def _release_connection(self, conn: imaplib.IMAP4_SSL):
         """Return a connection to the pool."""
         try:
@@ -311,20 +652,21 @@ class IMAPClient:
             except:
                 pass
 
-    def _generate_gmail_link(self, subject: str) -> Optional[str]:
-        """Generate Gmail web link for email using subject search."""
+    def _fetch_batch(self, message_set: str) -> list:
+        """Fetch headers for a set of UIDs on a pooled connection."""
+        conn = self._get_connection()
+        if not conn:
+            raise RuntimeError("Could not establish IMAP connection")
+
         try:
-            if not subject:
-                return None
-            # URL encode the subject for search
-            encoded_subject = urllib.parse.quote(subject)
-            # Construct the Gmail search URL
-            return (
-                f"https://mail.google.com/mail/u/0/#search/subject%3A{encoded_subject}"
+            _, header_data = conn.uid(
+                "FETCH",
+                message_set,
+                "(BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID)])",
             )
-        except Exception as e:
-            print(f"Error generating Gmail link: {str(e)}")
-            return None
+            return header_data
+        finally:
+            self._release_connection(conn)
 
     def fetch_emails(self, date_range: DateRange) -> List[EmailMetadata]:
         """Fetch emails from IMAP server for a given date range."""
@@ -341,82 +683,68 @@ class IMAPClient:
                 date_range.end.add(days=1).format("D-MMM-YYYY"),
             ]
 
-            # Search for messages in the date range
-            _, messages = conn.search(None, *search_criteria)
-            message_numbers = messages[0].split()
-
-            if not message_numbers:
-                return []
-
-            emails = []
-            batch_size = 100  # Process in batches to avoid memory issues
-            total_messages = len(message_numbers)
-
-            # Show progress for email fetching
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-                console=console,
-            ) as progress:
-                overall_task = progress.add_task(
-                    f"[cyan]Fetching {total_messages} emails from {date_range.start.format('YYYY-MM-DD')} to {date_range.end.format('YYYY-MM-DD')}...",
-                    total=total_messages,
-                )
+            # Search by UID so batches can be fetched on any pooled connection
+            _, messages = conn.uid("SEARCH", None, *search_criteria)
+            message_uids = messages[0].split()
+        finally:
+            self._release_connection(conn)
 
-                for i in range(0, total_messages, batch_size):
-                    current_batch_size = min(batch_size, total_messages - i)
-                    batch = message_numbers[i : i + current_batch_size]
-                    message_set = b",".join(batch).decode("utf-8")
+        if not message_uids:
+            return []
 
-                    # Fetch headers for the batch
-                    _, header_data = conn.fetch(
-                        message_set,
-                        "(BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID)])",
-                    )
+        emails = []
+        batch_size = 100  # Process in batches to avoid memory issues
+        total_messages = len(message_uids)
+        message_sets = [
+            (
+                b",".join(message_uids[i : i + batch_size]).decode("utf-8"),
+                len(message_uids[i : i + batch_size]),
+            )
+            for i in range(0, total_messages, batch_size)
+        ]
+
+        # Show progress for email fetching
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+            console=console,
+        ) as progress:
+            overall_task = progress.add_task(
+                f"[cyan]Fetching {total_messages} emails from {date_range.start.format('YYYY-MM-DD')} to {date_range.end.format('YYYY-MM-DD')}...",
+                total=total_messages,
+            )
 
-                    # Process each message in the batch
-                    for j in range(0, len(header_data), 2):
-                        if not header_data[j]:
-                            progress.advance(overall_task)
-                            continue
-
-                        header = email.message_from_bytes(header_data[j][1])
-
-                        # Parse email metadata
-                        message_id = header.get("Message-ID", "").strip()
-                        from_address = self._decode_header(header.get("From", ""))
-                        subject = self._decode_header(
-                            header.get("Subject", "(No Subject)")
-                        )
-                        date = self._parse_date(header.get("Date"))
-
-                        # Generate Gmail link using subject
-                        gmail_link = (
-                            self._generate_gmail_link(f'"{subject}"')
-                            if subject
-                            else None
-                        )
-
-                        if all([message_id, from_address, date]):
-                            emails.append(
-                                EmailMetadata(
-                                    message_id=message_id,
-                                    from_address=from_address,
-                                    subject=subject,
-                                    date=date,
-                                    gmail_link=gmail_link,
-                                )
-                            )
+            # Fetch batches concurrently, one pooled connection per worker
+            parse_pool = self._get_parse_pool()
+            parse_futures = []
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(self._fetch_batch, message_set): batch_count
+                    for message_set, batch_count in message_sets
+                }
+
+                for future in as_completed(futures):
+                    header_data = future.result()
+
+                    # Hand each batch to a worker process without waiting, so
+                    # parsing overlaps fetching and keeps every CPU busy
+                    raw_headers = [
+                        item[1] for item in header_data if isinstance(item, tuple)
+                    ]
+                    parse_futures.append(
+                        parse_pool.submit(_parse_header_batch, raw_headers)
+                    )
 
-                        # Update progress
-                        progress.advance(overall_task)
-            return emails
+                    # Update progress
+                    progress.advance(overall_task, futures[future])
 
-        finally:
-            self._release_connection(conn)
+            for parse_future in parse_futures:
+                emails.extend(parse_future.result())
+        return emails
 
-    def _decode_header(self, header: str) -> str:
+    @staticmethod
+    def _decode_header(header: str) -> str:
         """Safely decode email headers."""
         if not header:
             return ""
@@ -434,7 +762,8 @@ class IMAPClient:
             # If any error occurs during decoding, return the string representation
             return str(header)
 
-    def _parse_date(self, date_str: str) -> pendulum.DateTime:
+    @staticmethod
+    def _parse_date(date_str: str) -> pendulum.DateTime:
         """Parse email date string to pendulum DateTime."""
         if not date_str:
             return pendulum.now("UTC")
@@ -447,7 +776,11 @@ class IMAPClient:
             return pendulum.now("UTC")
 
     def cleanup(self):
-        """Clean up all IMAP connections."""
+        """Clean up all IMAP connections and the header parsing pool."""
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(cancel_futures=True)
+            self._parse_pool = None
+
         while not self.connection_pool.empty():
             try:
                 conn = self.connection_pool.get_nowait()
@@ -463,15 +796,49 @@ class IMAPClient:
 class EmailSearchService:
     """High-level service that orchestrates email searching and caching."""
 
-    def __init__(self, email_address: str, app_password: str):
+    def __init__(
+        self,
+        email_address: str,
+        app_password: str,
+        maintenance_interval: float = 900,
+    ):
         self.cache = EmailCache()
         self.imap_client = IMAPClient(email_address, app_password)
+        self.maintenance_interval = maintenance_interval
+        self._maintenance_timer: Optional[threading.Timer] = None
+        self._maintenance_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._schedule_maintenance()
+
+    def _schedule_maintenance(self):
+        """Arm the timer for the next periodic cache maintenance run."""
+        with self._maintenance_lock:
+            # cleanup() may have run while maintenance was in progress
+            if self._stopped.is_set():
+                return
+            self._maintenance_timer = threading.Timer(
+                self.maintenance_interval, self._run_maintenance
+            )
+            self._maintenance_timer.daemon = True
+            self._maintenance_timer.start()
+
+    def _run_maintenance(self):
+        """Refresh planner statistics and truncate the WAL when idle, then re-arm."""
+        # Holding the lock keeps cleanup() from closing the cache mid-run
+        with self._maintenance_lock:
+            if self._stopped.is_set():
+                return
+            try:
+                self.cache.optimize()
+            except Exception:
+                pass
+        self._schedule_maintenance()
 
     def search(
         self, pattern: str, days_back: Optional[int] = None
-    ) -> List[EmailMetadata]:
+    ) -> Iterator[EmailMetadata]:
         """
-        Search for emails matching the pattern.
+        Search for emails matching the pattern, newest first.
         If days_back is specified, only search emails from the last N days.
         """
         # Calculate target date range
@@ -506,21 +873,22 @@ class EmailSearchService:
                         console.print(f"\n[red]Error fetching emails: {str(e)}[/red]")
 
         # Now search through the cache
-        results = self.cache.search_emails(pattern, target_range)
-
-        # Sort by date, newest first
-        results = sorted(results, key=lambda x: x.date, reverse=True)
-
-        console.print(f"[green]✓ Found {len(results)} matching emails[/green]")
-
-        return results
+        return self.cache.search_emails(pattern, target_range)
 
     def cleanup(self):
         """Clean up resources."""
+        with self._maintenance_lock:
+            self._stopped.set()
+            if self._maintenance_timer is not None:
+                self._maintenance_timer.cancel()
         try:
             self.imap_client.cleanup()
         except Exception:
             pass
+        try:
+            self.cache.close()
+        except Exception:
+            pass
 
 
 def validate_credentials(email: str, password: str) -> bool:
@@ -598,29 +966,72 @@ def get_search_parameters() -> Tuple[str | None, Optional[int]]:
         return pattern, None
 
 
-def display_search_results(results: List[EmailMetadata], pattern: str):
-    """Display search results in a formatted table with pagination."""
-    if not results:
-        console.print("\n[yellow]No matching emails found.[/yellow]")
-        return False
+def generate_gmail_link(subject: str) -> Optional[str]:
+    """Generate Gmail web link for email using subject search."""
+    try:
+        if not subject:
+            return None
+        # URL encode the quoted subject for search
+        encoded_subject = urllib.parse.quote(f'"{subject}"')
+        # Construct the Gmail search URL
+        return f"https://mail.google.com/mail/u/0/#search/subject%3A{encoded_subject}"
+    except Exception as e:
+        print(f"Error generating Gmail link: {str(e)}")
+        return None
+
+
+def display_search_results(results: Iterable[EmailMetadata], pattern: str):
+    """
+    Display search results in a formatted table with pagination.
+    Results are consumed lazily; only pages already viewed are kept.
+    """
+    results = iter(results)
+    viewed: List[EmailMetadata] = []  # Kept so previous pages can be shown again
+    exhausted = False
+
+    def load(count: int):
+        """Pull results until `count` are loaded or none are left."""
+        nonlocal exhausted
+        while not exhausted and len(viewed) < count:
+            try:
+                viewed.append(next(results))
+            except StopIteration:
+                exhausted = True
 
     page_size = 20  # Number of results per page
-    total_results = len(results)
-    total_pages = (total_results + page_size - 1) // page_size
     current_page = 1
 
+    # Load one result past the page to know whether a next page exists
+    load(page_size + 1)
+    if not viewed:
+        console.print("\n[yellow]No matching emails found.[/yellow]")
+        return False
+
     while True:
-        console.clear()
+        load(current_page * page_size + 1)
         start_idx = (current_page - 1) * page_size
-        end_idx = min(start_idx + page_size, total_results)
-        page_results = results[start_idx:end_idx]
+        end_idx = min(start_idx + page_size, len(viewed))
+        page_results = viewed[start_idx:end_idx]
+        has_next = len(viewed) > end_idx
+
+        # Totals are only known once every result has been loaded
+        if exhausted:
+            total_results = len(viewed)
+            total_pages = (total_results + page_size - 1) // page_size
+            page_label = f"{current_page}/{total_pages}"
+            count_label = f" of {total_results}"
+        else:
+            page_label = str(current_page)
+            count_label = ""
+
+        console.clear()
 
         # Create a table for better display
         table = Table(
             show_header=True,
             header_style="bold magenta",
             border_style="blue",
-            title=f"Search Results ({pattern}) - Page {current_page}/{total_pages}",
+            title=f"Search Results ({pattern}) - Page {page_label}",
         )
         table.add_column("Date", style="cyan", width=20)
         table.add_column("From", style="yellow", width=30)
@@ -628,30 +1039,32 @@ def display_search_results(results: List[EmailMetadata], pattern: str):
         table.add_column("Link", style="blue", width=30)
 
         for email in page_results:
+            # Links are only built for the rows actually shown
+            gmail_link = generate_gmail_link(email.subject)
             table.add_row(
-                email.date.format("YYYY-MM-DD HH:mm"),
+                datetime.fromtimestamp(email.date).strftime("%Y-%m-%d %H:%M"),
                 email.from_address,
                 email.subject,
-                f"[link={email.gmail_link}]🔗 Open in Gmail[/link]",
+                f"[link={gmail_link}]🔗 Open in Gmail[/link]" if gmail_link else "",
             )
 
         console.print(table)
         console.print(
-            f"\n[cyan]Showing results {start_idx + 1}-{end_idx} of {total_results}[/cyan]"
+            f"\n[cyan]Showing results {start_idx + 1}-{end_idx}{count_label}[/cyan]"
         )
 
-        if total_pages > 1:
+        if current_page > 1 or has_next:
             console.print("\n[bold white]Navigation:[/bold white]")
             if current_page > 1:
                 console.print("  [blue]p[/blue] - Previous page", end="   ")
-            if current_page < total_pages:
+            if has_next:
                 console.print("[blue]n[/blue] - Next page", end="   ")
             console.print("[blue]q[/blue] - Return to search")
 
             choice = console.input("\nEnter choice: ").lower()
             if choice == "p" and current_page > 1:
                 current_page -= 1
-            elif choice == "n" and current_page < total_pages:
+            elif choice == "n" and has_next:
                 current_page += 1
             elif choice == "q":
                 break
@@ -668,8 +1081,9 @@ def handle_search(service: EmailSearchService):
         if pattern is None:  # User wants to exit
             return False
 
-        results = service.search(pattern, days)
-        display_search_results(results, pattern)
+        # Closing the result stream releases its cache connection
+        with closing(service.search(pattern, days)) as results:
+            display_search_results(results, pattern)
         console.print("\n[cyan]Press Enter to search again...[/cyan]")
         input()
         return True
@@ -0,0 +1,269 @@
+import os
+import re
+import sqlite3
+import time
+
+import pendulum
+import pytest
+
+from gmail_search.gmail_search import DateRange, EmailCache, EmailMetadata
+
+ADDRESSES = [
+    "user1@Example.com",
+    "user2@example.com",
+    "admin@example.COM",
+    "Alice <alice@mail.example.org>",
+    "bob.smith@work.net",
+    "noreply@github.com",
+    "a.b@x.io",
+    "support+tag@shop.co.uk",
+    "$money@cash.biz",
+]
+
+PATTERNS = [
+    "^user",
+    "^user\\d",
+    "^users?",
+    "^ad+min",
+    "example\\.com$",
+    "\\.com$",
+    "\\w\\.com$",
+    "COM$",
+    "(?i)example\\.COM$",
+    "(?i)^USER",
+    "(?x)^ad min",
+    "(?m)^alice",
+    "^Alice.*org>$",
+    "^\\$money",
+    "biz\\$",
+    "^bob|net$",
+    "a{2}$",
+    "example",
+    "gith",
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmailCache(str(tmp_path / "cache.db"))
+    emails = [
+        EmailMetadata(
+            message_id=f"<{i}@test>",
+            from_address=address,
+            subject=f"Subject {i}",
+            date=1_700_000_000 + i,
+        )
+        for i, address in enumerate(ADDRESSES)
+    ]
+    start = pendulum.from_timestamp(1_700_000_000)
+    cache.store_emails(emails, DateRange(start, start.add(days=1)))
+    yield cache
+    cache.close()
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_anchor_globs_never_exclude_matches(pattern):
+    globs = EmailCache._anchor_globs(pattern)
+    for address in ADDRESSES:
+        if re.search(pattern, address):
+            for glob in globs:
+                assert glob.endswith("*") or glob.startswith("*")
+                literal = glob.strip("*")
+                if glob.endswith("*"):
+                    assert address.startswith(literal), (pattern, glob, address)
+                else:
+                    assert address.endswith(literal), (pattern, glob, address)
+
+
+def test_anchor_globs_skip_inline_flags():
+    assert EmailCache._anchor_globs("(?i)example\\.COM$") == []
+    assert EmailCache._anchor_globs("(?i)^user") == []
+    assert EmailCache._anchor_globs("^user") == ["user*"]
+    assert EmailCache._anchor_globs("\\.com$") == ["*com"]
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_search_emails_matches_re_search(cache, pattern):
+    expected = {address for address in ADDRESSES if re.search(pattern, address)}
+    found = {email.from_address for email in cache.search_emails(pattern)}
+    assert found == expected
+
+
+def _store_range(cache, start, end, message_id="<range@test>"):
+    email = EmailMetadata(
+        message_id=message_id,
+        from_address="range@example.com",
+        subject="Range",
+        date=start.int_timestamp,
+    )
+    cache.store_emails([email], DateRange(start, end))
+
+
+def _table_ranges(cache):
+    rows = cache._writer.execute(
+        "SELECT start_date, end_date FROM date_ranges ORDER BY start_date"
+    ).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def _memory_ranges(cache):
+    return [(r.start.isoformat(), r.end.isoformat()) for r in cache.get_cached_ranges()]
+
+
+def test_adjacent_and_overlapping_ranges_merge(tmp_path):
+    cache = EmailCache(str(tmp_path / "cache.db"))
+    day = pendulum.datetime(2024, 1, 1)
+    _store_range(cache, day, day.add(days=1))
+    _store_range(cache, day.add(days=1), day.add(days=2))
+    _store_range(cache, day.add(days=1, hours=12), day.add(days=3))
+
+    assert _table_ranges(cache) == [(day.isoformat(), day.add(days=3).isoformat())]
+    assert _memory_ranges(cache) == _table_ranges(cache)
+    cache.close()
+
+
+def test_covered_range_does_not_write(tmp_path):
+    cache = EmailCache(str(tmp_path / "cache.db"))
+    day = pendulum.datetime(2024, 1, 1)
+    _store_range(cache, day, day.add(days=3))
+    before = cache._writer.execute("SELECT id, start_date, end_date FROM date_ranges")
+    before = before.fetchall()
+
+    _store_range(cache, day.add(days=1), day.add(days=2))
+
+    after = cache._writer.execute("SELECT id, start_date, end_date FROM date_ranges")
+    assert after.fetchall() == before
+    cache.close()
+
+
+def test_reopened_cache_matches_table(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = EmailCache(db_path)
+    day = pendulum.datetime(2024, 1, 1)
+    _store_range(cache, day, day.add(days=1))
+    _store_range(cache, day.add(days=5), day.add(days=6))
+    _store_range(cache, day.add(days=2), day.add(days=3))
+    cache.close()
+
+    cache = EmailCache(db_path)
+    assert len(cache.get_cached_ranges()) == 3
+    assert _memory_ranges(cache) == _table_ranges(cache)
+    cache.close()
+
+
+class _FailingCommit:
+    """Writer proxy whose commit fails after all statements have run."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self):
+        raise sqlite3.OperationalError("disk I/O error")
+
+
+def test_failed_store_restores_ranges(tmp_path):
+    cache = EmailCache(str(tmp_path / "cache.db"))
+    day = pendulum.datetime(2024, 1, 1)
+    _store_range(cache, day, day.add(days=1))
+    before = _memory_ranges(cache)
+
+    writer = cache._writer
+    cache._writer = _FailingCommit(writer)
+    with pytest.raises(sqlite3.OperationalError):
+        _store_range(cache, day.add(hours=12), day.add(days=4), "<fail@test>")
+    cache._writer = writer
+
+    assert _memory_ranges(cache) == before
+    assert _table_ranges(cache) == before
+    cache.close()
+
+
+def test_legacy_emails_table_is_migrated(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE emails (
+            message_id TEXT PRIMARY KEY,
+            from_address TEXT NOT NULL,
+            subject TEXT,
+            date TEXT NOT NULL,
+            gmail_link TEXT,
+            cached_at TEXT NOT NULL
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO emails VALUES (?, ?, ?, ?, 'https://mail.google.com/', 'now')",
+        [
+            ("<1@test>", "alice@example.com", "Hi", "2024-01-02T05:04:05+02:00"),
+            ("<2@test>", "bob@example.com", "Yo", "2024-01-02T03:04:05+00:00"),
+            ("<3@test>", "carol@example.com", "Hey", "not a date"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    cache = EmailCache(db_path)
+    columns = cache._writer.execute("PRAGMA table_info(emails)").fetchall()
+    assert [(column[1], column[2], column[3]) for column in columns] == [
+        ("message_id", "TEXT", 0),
+        ("from_address", "TEXT", 1),
+        ("subject", "TEXT", 0),
+        ("date", "INTEGER", 1),
+        ("cached_at", "TEXT", 1),
+    ]
+
+    # Both offsets name the same instant; the unparseable row is dropped
+    rows = cache._writer.execute(
+        "SELECT message_id, date FROM emails ORDER BY message_id"
+    ).fetchall()
+    expected = pendulum.datetime(2024, 1, 2, 3, 4, 5).int_timestamp
+    assert rows == [("<1@test>", expected), ("<2@test>", expected)]
+
+    assert cache._fts_phrase("example") is not None
+    found = {email.message_id for email in cache.search_emails("example")}
+    assert found == {"<1@test>", "<2@test>"}
+    assert [email.message_id for email in cache.search_emails("alice")] == ["<1@test>"]
+    cache.close()
+
+
+def _bulk_store(cache, count):
+    start = pendulum.datetime(2024, 1, 1)
+    emails = [
+        EmailMetadata(
+            message_id=f"<bulk{i}@test>",
+            from_address=f"sender{i}@example.com",
+            subject=f"Bulk subject {i}",
+            date=start.int_timestamp + i,
+        )
+        for i in range(count)
+    ]
+    cache.store_emails(emails, DateRange(start, start.add(days=1)))
+
+
+def test_optimize_truncates_wal(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = EmailCache(db_path)
+    _bulk_store(cache, 5000)
+    assert os.path.getsize(db_path + "-wal") > 0
+
+    cache.optimize()
+    assert os.path.getsize(db_path + "-wal") == 0
+    cache.close()
+
+
+def test_optimize_does_not_wait_on_open_reader(tmp_path):
+    cache = EmailCache(str(tmp_path / "cache.db"))
+    _bulk_store(cache, 5000)
+    results = cache.search_emails("^sender")
+    next(results)
+
+    started = time.monotonic()
+    cache.optimize()
+    assert time.monotonic() - started < 1
+    assert cache._writer.execute("PRAGMA busy_timeout").fetchone() == (5000,)
+
+    results.close()
+    cache.close()